@@ -63,7 +63,7 @@ def download_hourly_weather_data(longitude, latitude, year):
 
     # build DataFrame with full timestamps (not just dates)
     df = pd.DataFrame({
-        'timestamp': pd.to_datetime(hourly['time']),
+        'timestamp': pd.to_datetime(hourly['time'], format='ISO8601'),
         'temperature (°C)': hourly.get('temperature_2m'),
         'apparent_temperature (°C)': hourly.get('apparent_temperature'),
         'precipitation (mm)': hourly.get('precipitation'),
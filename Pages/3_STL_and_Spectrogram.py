@@ -1,11 +1,16 @@
 import streamlit as st
+from io import BytesIO
 import pandas as pd
 import matplotlib.pyplot as plt
+import altair as alt
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
-import toml
 import numpy as np
-from functools import lru_cache
+
+try:
+    import tomllib  # stdlib TOML parser (Python 3.11+)
+except ModuleNotFoundError:
+    tomllib = None
 
 # Optional imports for STL and Spectrogram
 try:
@@ -25,68 +30,154 @@ except Exception:
     signal = None
     _SCIPY_AVAILABLE = False
 
+# Optional: PyMongoArrow decodes BSON straight into Arrow columns (no per-document dicts)
+try:
+    from pymongoarrow.api import find_pandas_all
+    _PYMONGOARROW_AVAILABLE = True
+except Exception:
+    find_pandas_all = None
+    _PYMONGOARROW_AVAILABLE = False
+
 # --- Page Config ---
 st.set_page_config(page_title="Advanced Time Series Analysis", layout="wide")
 
 # --- MongoDB Connection ---
-@lru_cache(maxsize=1)
+@st.cache_resource
 def init_connection():
-    secrets = toml.load(".streamlit/secrets.toml")
+    if tomllib is not None:
+        with open(".streamlit/secrets.toml", "rb") as f:
+            secrets = tomllib.load(f)
+    else:
+        import toml
+        secrets = toml.load(".streamlit/secrets.toml")
     uri = secrets["MONGO"]["uri"]
     return MongoClient(uri, server_api=ServerApi('1'))
 
-@lru_cache(maxsize=1)
+# Only the fields used by the analyses below are fetched from MongoDB
+PRODUCTION_FIELDS = ['startTime', 'endTime', 'priceArea', 'productionGroup', 'quantityKwh']
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def load_production_data():
     client = init_connection()
     db = client['Database']
     collection = db['data']
-    records = list(collection.find({}, {'_id': 0}))
-    if not records:
+    projection = {'_id': 0, **{field: 1 for field in PRODUCTION_FIELDS}}
+    if _PYMONGOARROW_AVAILABLE:
+        df = find_pandas_all(collection, {}, schema=PRODUCTION_SCHEMA, projection=projection)
+    else:
+        # Stream the cursor straight into per-column lists instead of materializing a list of dicts
+        columns = {field: [] for field in PRODUCTION_FIELDS}
+        for doc in collection.find({}, projection).batch_size(10000):
+            for field, values in columns.items():
+                values.append(doc.get(field))
+        df = pd.DataFrame(columns)
+    if df.empty:
         raise ValueError("No data found in MongoDB! Please insert data first.")
-    df = pd.DataFrame(records)
-    df['startTime_parsed'] = pd.to_datetime(df['startTime'], utc=True)
-    df['endTime_parsed'] = pd.to_datetime(df['endTime'], utc=True)
+    df['startTime_parsed'] = pd.to_datetime(df['startTime'], utc=True, format='ISO8601')
+    df['endTime_parsed'] = pd.to_datetime(df['endTime'], utc=True, format='ISO8601')
+    # Sort once here so every per-group series downstream is already in time order
+    if not df['startTime_parsed'].is_monotonic_increasing:
+        df.sort_values('startTime_parsed', inplace=True, ignore_index=True, kind='stable')
     return df
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_filter_options():
+    """Return the sorted price areas and production groups for the selectboxes."""
+    df = load_production_data()
+    return sorted(df['priceArea'].unique()), sorted(df['productionGroup'].unique())
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_series_map():
+    """Group production once into {(priceArea, productionGroup): (times, quantityKwh)} sorted by time.
+
+    Gaps are forward/back-filled here and values stored as float32, so button presses only pay for STL/FFT.
+    """
+    df = load_production_data()
+    return {
+        key: (
+            pd.DatetimeIndex(group['startTime_parsed']),
+            group['quantityKwh'].ffill().bfill().to_numpy(dtype=np.float32),
+        )
+        for key, group in df.groupby(['priceArea', 'productionGroup'], sort=False)
+    }
+
 # --- STL Decomposition ---
-def stl_analysis(df, price_area, production_group, period=24, seasonal=7, trend=None, robust=False):
+STL_COMPONENTS = ['Original', 'Trend', 'Seasonal', 'Residual']
+STL_COLORS = ['black', 'blue', 'green', 'red']
+
+@st.cache_data(show_spinner=False)
+def build_stl_spec(title):
+    """Vega-Lite spec (without data) for the stacked STL components, serialized once per title.
+
+    Components are rendered client-side by Vega instead of as a server-side matplotlib PNG;
+    the wide frame is shipped as-is and the long-form fold happens inside the spec.
+    """
+    chart = alt.Chart().transform_fold(
+        STL_COMPONENTS, as_=['component', 'value']
+    ).mark_line(strokeWidth=1).encode(
+        x=alt.X('time:T', title=None),
+        y=alt.Y('value:Q', title=None),
+        color=alt.Color('component:N', scale=alt.Scale(domain=STL_COMPONENTS, range=STL_COLORS), legend=None),
+        row=alt.Row('component:N', sort=STL_COMPONENTS, title=None),
+    ).resolve_scale(
+        y='independent'
+    ).properties(
+        width=900, height=160, title=title
+    )
+    return chart.to_dict()
+
+def stl_analysis(series_map, price_area, production_group, period=24, seasonal=7, trend=None, robust=False):
     if not _STL_AVAILABLE:
         return None, "⚠️ STL not available (install statsmodels)"
-    filtered = df[(df['priceArea'] == price_area) & (df['productionGroup'] == production_group)]
-    if filtered.empty:
+    series = series_map.get((price_area, production_group))
+    if series is None:
         return None, "No data available for this combination"
-    ts = pd.Series(filtered['quantityKwh'].values, index=filtered['startTime_parsed']).ffill().bfill()
+    times, values = series
+    ts = pd.Series(values, index=times)
     stl = STL(ts, period=period, seasonal=seasonal, trend=trend, robust=robust)
     result = stl.fit()
 
-    fig, axes = plt.subplots(4, 1, figsize=(15, 10))
-    axes[0].plot(ts, color='black', linewidth=1)
-    axes[0].set_title(f"{production_group} — {price_area}", fontsize=14, fontweight='bold')
-    labels = ['Trend', 'Seasonal', 'Residual']
-    colors = ['blue', 'green', 'red']
-    for i, comp in enumerate([result.trend, result.seasonal, result.resid]):
-        axes[i+1].plot(ts.index, comp, color=colors[i])
-        axes[i+1].set_ylabel(labels[i], fontsize=11, fontweight='bold')
-        axes[i+1].grid(True, alpha=0.3)
-    for ax in axes:
-        ax.tick_params(axis='x', rotation=45)
-    plt.tight_layout()
-    return fig, None
+    components = pd.DataFrame({
+        'time': ts.index,
+        'Original': np.asarray(ts, dtype=np.float32),
+        'Trend': np.asarray(result.trend, dtype=np.float32),
+        'Seasonal': np.asarray(result.seasonal, dtype=np.float32),
+        'Residual': np.asarray(result.resid, dtype=np.float32),
+    })
+    return components, None
 
 # --- Spectrogram ---
-def spectrogram_analysis(df, price_area, production_group, window_length=168, window_overlap=84):
-    filtered = df[(df['priceArea'] == price_area) & (df['productionGroup'] == production_group)]
-    if filtered.empty:
+def numpy_spectrogram(x, nperseg, noverlap):
+    """NumPy-only spectrogram matching scipy.signal.spectrogram defaults (Hann window, density scaling, fs=1)."""
+    nperseg = min(nperseg, len(x))
+    noverlap = min(noverlap, nperseg - 1)
+    step = nperseg - noverlap
+    window = np.hanning(nperseg + 1)[:-1]  # periodic Hann, as used by scipy
+    # All segments as a strided view, transformed in one batched rfft call
+    frames = np.lib.stride_tricks.sliding_window_view(x, nperseg)[::step]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    Sxx = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 / (window ** 2).sum()
+    if nperseg % 2:
+        Sxx[:, 1:] *= 2
+    else:
+        Sxx[:, 1:-1] *= 2
+    f = np.fft.rfftfreq(nperseg)
+    t = np.arange(frames.shape[0]) * step + nperseg / 2
+    return f, t, Sxx.T
+
+def spectrogram_analysis(series_map, price_area, production_group, window_length=168, window_overlap=84):
+    series = series_map.get((price_area, production_group))
+    if series is None:
         return None, "No data available for this combination"
-    production = pd.Series(filtered['quantityKwh'].values).ffill().bfill().values
+    _times, production = series
     if _SCIPY_AVAILABLE:
         f, t, Sxx = signal.spectrogram(production, fs=1.0, window='hann',
                                        nperseg=window_length, noverlap=window_overlap)
     else:
-        return None, "⚠️ SciPy not available (install scipy)"
+        f, t, Sxx = numpy_spectrogram(production, window_length, window_overlap)
     Sxx_db = 10 * np.log10(Sxx + 1e-10)
     fig, ax = plt.subplots(figsize=(15, 8))
-    im = ax.pcolormesh(t, f, Sxx_db, shading='gouraud', cmap='viridis')
+    im = ax.pcolormesh(t, f, Sxx_db, shading='auto', cmap='viridis')
     plt.colorbar(im, ax=ax, label='Power (dB)')
     ax.set_xlabel('Time (hours)', fontsize=12, fontweight='bold')
     ax.set_ylabel('Frequency (cycles/hour)', fontsize=12, fontweight='bold')
@@ -94,52 +185,73 @@ def spectrogram_analysis(df, price_area, production_group, window_length=168, wi
     plt.tight_layout()
     return fig, None
 
-# --- Page Layout ---
-st.title("📊 Advanced Time Series Analysis")
-st.caption("Analyze electricity production patterns with STL decomposition and spectrograms.")
-st.markdown("---")
-
-try:
-    df = load_production_data()
-    price_areas = sorted(df['priceArea'].unique())
-    production_groups = sorted(df['productionGroup'].unique())
+# --- Tab fragments (widget changes rerun only the fragment, not the whole page) ---
+@st.fragment
+def stl_tab(series_map, price_areas, production_groups):
+    col1, col2, col3 = st.columns(3)
+    stl_area = col1.selectbox("Price Area", price_areas, key="stl_area")
+    stl_group = col2.selectbox("Production Group", production_groups, key="stl_group")
+    stl_period = col3.number_input("Seasonal Period", 2, 720, 24)
 
-    tab1, tab2 = st.tabs(["🧩 STL Decomposition", "🎵 Spectrogram"])
+    col4, col5 = st.columns(2)
+    stl_seasonal = col4.slider("Seasonal Smoothing", 3, 25, 7, step=2)
+    stl_robust = col5.checkbox("Robust Fitting", True)
 
-    with tab1:
-        col1, col2, col3 = st.columns(3)
-        stl_area = col1.selectbox("Price Area", price_areas, key="stl_area")
-        stl_group = col2.selectbox("Production Group", production_groups, key="stl_group")
-        stl_period = col3.number_input("Seasonal Period", 2, 720, 24)
-
-        col4, col5 = st.columns(2)
-        stl_seasonal = col4.slider("Seasonal Smoothing", 3, 25, 7, step=2)
-        stl_robust = col5.checkbox("Robust Fitting", True)
-
-        if st.button("Run STL Analysis", key="stl_button"):
+    if st.button("Run STL Analysis", key="stl_button"):
+        # Fragment reruns bypass the page-level try/except, so errors are handled here too
+        try:
             with st.spinner("Running STL Decomposition..."):
-                fig, error = stl_analysis(df, stl_area, stl_group, stl_period, stl_seasonal, robust=stl_robust)
+                components, error = stl_analysis(series_map, stl_area, stl_group, stl_period, stl_seasonal, robust=stl_robust)
                 if error:
                     st.error(error)
                 else:
-                    st.pyplot(fig)
+                    st.vega_lite_chart(components, build_stl_spec(f"{stl_group} — {stl_area}"))
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+            st.exception(e)
 
-    with tab2:
-        col1, col2 = st.columns(2)
-        spec_area = col1.selectbox("Price Area", price_areas, key="spec_area")
-        spec_group = col2.selectbox("Production Group", production_groups, key="spec_group")
+@st.fragment
+def spectrogram_tab(series_map, price_areas, production_groups):
+    col1, col2 = st.columns(2)
+    spec_area = col1.selectbox("Price Area", price_areas, key="spec_area")
+    spec_group = col2.selectbox("Production Group", production_groups, key="spec_group")
 
-        col3, col4 = st.columns(2)
-        spec_window = col3.slider("Window Length (hours)", 24, 720, 168, step=24)
-        spec_overlap = col4.slider("Window Overlap (hours)", 0, int(spec_window * 0.9), int(spec_window * 0.5), step=12)
+    col3, col4 = st.columns(2)
+    spec_window = col3.slider("Window Length (hours)", 24, 720, 168, step=24)
+    spec_overlap = col4.slider("Window Overlap (hours)", 0, int(spec_window * 0.9), int(spec_window * 0.5), step=12)
 
-        if st.button("Create Spectrogram", key="spec_button"):
+    if st.button("Create Spectrogram", key="spec_button"):
+        try:
             with st.spinner("Computing Spectrogram..."):
-                fig, error = spectrogram_analysis(df, spec_area, spec_group, spec_window, spec_overlap)
+                fig, error = spectrogram_analysis(series_map, spec_area, spec_group, spec_window, spec_overlap)
                 if error:
                     st.error(error)
                 else:
-                    st.pyplot(fig)
+                    # Save at 80 dpi ourselves; st.pyplot's savefig kwargs are deprecated
+                    buf = BytesIO()
+                    fig.savefig(buf, format="png", dpi=80)
+                    plt.close(fig)
+                    st.image(buf)
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+            st.exception(e)
+
+# --- Page Layout ---
+st.title("📊 Advanced Time Series Analysis")
+st.caption("Analyze electricity production patterns with STL decomposition and spectrograms.")
+st.markdown("---")
+
+try:
+    series_map = load_series_map()
+    price_areas, production_groups = load_filter_options()
+
+    tab1, tab2 = st.tabs(["🧩 STL Decomposition", "🎵 Spectrogram"])
+
+    with tab1:
+        stl_tab(series_map, price_areas, production_groups)
+
+    with tab2:
+        spectrogram_tab(series_map, price_areas, production_groups)
 
 except Exception as e:
     st.error(f"Error: {str(e)}")
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from functools import lru_cache
 from StreamlitApplication.Data_loader import load_data
 
 # Page configuration (must be before other st.* display calls)
@@ -10,6 +11,7 @@ st.set_page_config(
 )
 
 
+@lru_cache(maxsize=None)
 def pretty_name(col: str) -> str:
     """Convert a column name to a nicer display name (remove underscores, title case)."""
     return col.replace("_", " ").title()
@@ -57,14 +59,14 @@ def ensure_time_column(df: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def get_first_month_data(df: pd.DataFrame, column: str, max_points: int = 31 * 24):
+def get_first_month_data(df: pd.DataFrame, columns: list, max_points: int = 31 * 24):
     """
-    Extract the first calendar month of data for a specific column.
+    Extract the first calendar month of data for the given columns.
     Returns up to max_points rows (default up to 31 days * 24 hours).
     """
     df = ensure_time_column(df)
     if 'time' not in df.columns or df.empty:
-        return pd.DataFrame({'time': [], column: []})
+        return pd.DataFrame(columns=['time', *columns])
 
     # --- Force proper datetime conversion and remove timezone ---
     df['time'] = pd.to_datetime(df['time'], errors='coerce').dt.tz_localize(None)
@@ -72,65 +74,61 @@ def get_first_month_data(df: pd.DataFrame, column: str, max_points: int = 31 * 2
 
     # --- Get first timestamp's month and year ---
     first_ts = df['time'].iloc[0]
+    if df['time'].is_monotonic_increasing:
+        # Sorted times: the first month is a leading slice ending at the next month's start
+        next_month = first_ts.normalize().replace(day=1) + pd.offsets.MonthBegin(1)
+        end = df['time'].searchsorted(next_month)
+        first_month = df.iloc[:min(end, max_points)][['time', *columns]]
+        return first_month
+
     first_month_mask = (
         (df['time'].dt.month == first_ts.month) &
         (df['time'].dt.year == first_ts.year)
     )
 
-    first_month = df.loc[first_month_mask, ['time', column]].head(max_points)
+    first_month = df.loc[first_month_mask, ['time', *columns]].head(max_points)
     return first_month
 
 
-# Main page content
-st.title("Weather Data Table with First Month Trends")
-st.markdown("---")
+@st.cache_data(show_spinner=False)
+def build_summary_table(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the per-variable summary table (stats + first month trend).
+    Cached so reruns with the same data skip the time parsing, slicing and stats.
+    """
+    # ensure_time_column already works on its own copy, so data is not copied again here
+    df = ensure_time_column(data)
 
-data = get_weather_data()
+    # Select numeric columns (exclude 'time' if present)
+    data_columns = df.select_dtypes(include='number').columns.drop('time', errors='ignore').tolist()
 
-if data is None or len(data) == 0:
-    st.warning("⚠️ No weather data loaded. Please visit the page that downloads weather data first.")
-    st.info("Once you download data on that page, it will be available here for viewing.")
-else:
-    st.success(f"✅ Weather data loaded: {len(data)} records")
-    if 'selected_area' in st.session_state:
-        sel_city = st.session_state.get('selected_city', '')
-        st.info(f"📍 Data for: **{st.session_state.selected_area}** ({sel_city})")
+    # --- Slice the first month once and convert all trend columns in a single pass ---
+    first_month_df = get_first_month_data(df, data_columns)
+    if first_month_df.empty:
+        st.warning("No valid data for first month trends.")
+    # float32 is plenty for sparklines and halves the bytes serialized to the browser
+    trend_arrays = dict(zip(data_columns, first_month_df[data_columns].to_numpy(dtype=np.float32).T))
 
-try:
-    # Work on a copy and ensure time column if possible
-    df = data.copy()
-    df = ensure_time_column(df)
-    
+    # --- Column statistics for all numeric columns at once (one 2-D pass, not one per column) ---
+    stats = df[data_columns].agg(['mean', 'std', 'min', 'max'])
+    has_values = df[data_columns].notna().any()
 
-    # Select numeric columns (exclude 'time' if present)
-    data_columns = [col for col in df.columns if col != 'time' and pd.api.types.is_numeric_dtype(df[col])]
     # --- Build the summary table first ---
     table_data = []
     # iterate numeric columns previously selected
     for column in data_columns:
-        # convert to numeric, coercing errors to NaN, and skip if no valid values
-        s = pd.to_numeric(df[column], errors='coerce')
-        if s.dropna().empty:
+        # skip columns without any valid values
+        if not has_values[column]:
             continue
 
-        col_mean = s.mean()
-        col_std = s.std()
-        col_min = s.min()
-        col_max = s.max()
-
-        first_month_df = get_first_month_data(df, column)
+        col_mean = stats.at['mean', column]
+        col_std = stats.at['std', column]
+        col_min = stats.at['min', column]
+        col_max = stats.at['max', column]
 
-        if first_month_df.empty:
-            st.warning(f"No valid data for first month trend of column '{column}'.")
-            y_values = []
-        else:
-            y_values = first_month_df[column].dropna().astype(float).tolist()
-            if not y_values:
-                st.warning(f"No valid numeric data for first month trend of column '{column}'.")
-                continue
-
-            # If we have valid y_values, we can proceed
-            pass    
+        trend = trend_arrays[column]
+        # Keep the trend as an ndarray; Arrow serializes it for LineChartColumn without per-value boxing.
+        y_values = trend[~np.isnan(trend)]
         if len(y_values) == 0:
             st.warning(f"No valid numeric data for first month trend of column '{column}'.")
             continue
@@ -146,30 +144,55 @@ try:
         })
 
     # Convert to dataframe
-    display_df = pd.DataFrame(table_data)
-
-    # --- Display one single dataframe (outside any loop) ---
-    st.header("Dataset with First Month Line Charts")
-    st.caption("Each row represents a variable from the dataset, with a line chart showing the first month of data.")
-
-    st.dataframe(
-        display_df,
-        hide_index=True,
-        width='stretch',
-        column_config={
-            "Variable Name": st.column_config.TextColumn("Variable Name", width="medium"),
-            "Mean": st.column_config.TextColumn("Mean", width="small"),
-            "Std Dev": st.column_config.TextColumn("Std Dev", width="small"),
-            "Min": st.column_config.TextColumn("Min", width="small"),
-            "Max": st.column_config.TextColumn("Max", width="small"),
-            "First Month Trend": st.column_config.LineChartColumn(
-                "First Month Trend",
-                width="large",
-                help="Visualization of the first month of data"
-            ),
-        }
-    )
+    return pd.DataFrame(table_data)
+
+
+# Page body; st.navigation runs this file as __main__, so the guard at the bottom calls main()
+def main():
+    """Render the page. Runs only when the file is executed as __main__, not when it is imported."""
+    st.title("Weather Data Table with First Month Trends")
+    st.markdown("---")
 
-except Exception as e:
-    st.error(f"An error occurred: {str(e)}")
-    st.exception(e)
+    data = get_weather_data()
+
+    if data is None or len(data) == 0:
+        st.warning("⚠️ No weather data loaded. Please visit the page that downloads weather data first.")
+        st.info("Once you download data on that page, it will be available here for viewing.")
+    else:
+        st.success(f"✅ Weather data loaded: {len(data)} records")
+        if 'selected_area' in st.session_state:
+            sel_city = st.session_state.get('selected_city', '')
+            st.info(f"📍 Data for: **{st.session_state.selected_area}** ({sel_city})")
+
+    try:
+        display_df = build_summary_table(data)
+
+        # --- Display one single dataframe (outside any loop) ---
+        st.header("Dataset with First Month Line Charts")
+        st.caption("Each row represents a variable from the dataset, with a line chart showing the first month of data.")
+
+        st.dataframe(
+            display_df,
+            hide_index=True,
+            width='stretch',
+            column_config={
+                "Variable Name": st.column_config.TextColumn("Variable Name", width="medium"),
+                "Mean": st.column_config.TextColumn("Mean", width="small"),
+                "Std Dev": st.column_config.TextColumn("Std Dev", width="small"),
+                "Min": st.column_config.TextColumn("Min", width="small"),
+                "Max": st.column_config.TextColumn("Max", width="small"),
+                "First Month Trend": st.column_config.LineChartColumn(
+                    "First Month Trend",
+                    width="large",
+                    help="Visualization of the first month of data"
+                ),
+            }
+        )
+
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+        st.exception(e)
+
+
+if __name__ == "__main__":
+    main()
@@ -51,8 +51,7 @@ def ensure_time_column(df: pd.DataFrame) -> pd.DataFrame:
 
 def get_first_month_data(df: pd.DataFrame, column: str, max_points: int = 31 * 24):
     """Get data for the first month (up to max_points) for the specified column."""
-    df = df.copy()
-    df = ensure_time_column(df)
+    df = ensure_time_column(df)  # returns a copy
 
     if 'time' not in df.columns:
         st.error("Cannot extract first month data: No 'time' column found.")
@@ -71,6 +70,60 @@ def get_first_month_data(df: pd.DataFrame, column: str, max_points: int = 31 * 2
     return monthly_data
 
 
+@st.cache_data(show_spinner=False)
+def month_periods(time: pd.Series) -> pd.PeriodIndex:
+    """Return the calendar month of every timestamp, computed once per dataset."""
+    return pd.PeriodIndex(time.dt.to_period('M'))
+
+
+def filter_month_range(df: pd.DataFrame, months: pd.PeriodIndex, start, end) -> pd.DataFrame:
+    """Return the rows of df whose month lies in [start, end]."""
+    if months.is_monotonic_increasing:
+        # Sorted data: binary-search the bounds and take a positional slice
+        lo = months.searchsorted(start, side='left')
+        hi = months.searchsorted(end, side='right')
+        return df.iloc[lo:hi]
+    return df[(months >= start) & (months <= end)]
+
+
+@st.fragment
+def plot_explorer(data: pd.DataFrame, months: pd.PeriodIndex, data_columns: list):
+    """Variable/month controls with the plot and statistics; widget changes rerun only this block."""
+    col1, col2 = st.columns(2)
+    with col1:
+        # Multi-select defaulting to all variables
+        selected_columns = st.multiselect("Select Variable to Plot", data_columns, default=data_columns)
+    with col2:
+        available_months = months.unique().sort_values()
+        month_range = st.select_slider("Select Month Range", available_months, value=(available_months[0], available_months[-1]), format_func=str)
+
+    try:
+        # Filter by month range
+        df_filtered = filter_month_range(data, months, month_range[0], month_range[1])
+
+        # Plot selected columns (multiple allowed)
+        st.subheader("📈 Weather Data Visualization")
+        plt.figure(figsize=(10, 4))
+        for i, col_name in enumerate(selected_columns):
+            plt.plot(df_filtered['time'], df_filtered[col_name], label=col_name, linewidth=1)
+        plt.title(f"{' ,'.join(selected_columns)} over Time ({month_range[0]} → {month_range[1]})")
+        plt.xlabel("Time")
+        plt.ylabel("Value")
+        plt.xticks(rotation=45)
+        if len(selected_columns) > 1:
+            plt.legend(loc='upper right', fontsize='small')
+        plt.tight_layout()
+        st.pyplot(plt)
+
+        # Statistics for selected columns
+        st.markdown("---")
+        st.subheader("📊 Basic Statistics")
+        st.dataframe(df_filtered[selected_columns].describe())
+    except Exception as e:
+        st.error(f"Error displaying weather plot: {e}")
+        st.exception(e)
+
+
 # ---------------------------
 # Main Page
 # ---------------------------
@@ -89,8 +142,8 @@ else:
     # ✅ Ensure time column
     data = ensure_time_column(data)
 
-    # ✅ Derive year-month for filtering
-    data['year_month'] = data['time'].dt.to_period('M').astype(str)
+    # ✅ Derive year-month for filtering (cached, reused by the slider and the filter)
+    months = month_periods(data['time'])
 
     # ✅ Rename columns for clarity (your requested names)
     rename_map = {
@@ -105,41 +158,13 @@ else:
     st.success(f"✅ Weather data loaded: {len(data):,} records")
     # Provide a multi-select that defaults to all numeric variables and render the plot/stats here,
     # then stop further execution so the later duplicate widgets aren't shown.
-    data_columns = [col for col in data.columns if col not in ['time', 'year_month'] and np.issubdtype(data[col].dtype, np.number)]
+    data_columns = data.select_dtypes(include=np.number).columns.drop('time', errors='ignore').tolist()
 
     if len(data_columns) == 0:
         st.warning("No numeric variables available to plot.")
         st.stop()
 
-    col1, col2 = st.columns(2)
-    with col1:
-        # Multi-select defaulting to all variables
-        selected_columns = st.multiselect("Select Variable to Plot", data_columns, default=data_columns)
-    with col2:
-        available_months = sorted(data['year_month'].unique())
-        month_range = st.select_slider("Select Month Range", available_months, value=(available_months[0], available_months[-1]))
-
-    # Filter by month range
-    df_filtered = data[(data['year_month'] >= month_range[0]) & (data['year_month'] <= month_range[1])]
-
-    # Plot selected columns (multiple allowed)
-    st.subheader("📈 Weather Data Visualization")
-    plt.figure(figsize=(10, 4))
-    for i, col_name in enumerate(selected_columns):
-        plt.plot(df_filtered['time'], df_filtered[col_name], label=col_name, linewidth=1)
-    plt.title(f"{' ,'.join(selected_columns)} over Time ({month_range[0]} → {month_range[1]})")
-    plt.xlabel("Time")
-    plt.ylabel("Value")
-    plt.xticks(rotation=45)
-    if len(selected_columns) > 1:
-        plt.legend(loc='upper right', fontsize='small')
-    plt.tight_layout()
-    st.pyplot(plt)
-
-    # Statistics for selected columns
-    st.markdown("---")
-    st.subheader("📊 Basic Statistics")
-    st.dataframe(df_filtered[selected_columns].describe())
+    plot_explorer(data, months, data_columns)
 
     # Stop further execution to avoid duplicate widgets/plots later in the file
     st.stop()
@@ -148,18 +173,15 @@ else:
         st.info(f"📍 Data for: **{st.session_state.selected_area}** ({sel_city})")
 
     try:
-        # Filter numeric columns
-        data_columns = [col for col in data.columns if col not in ['time', 'year_month'] and np.issubdtype(data[col].dtype, np.number)]
-
         col1, col2 = st.columns(2)
         with col1:
             selected_column = st.selectbox("Select Variable to Plot", data_columns)
         with col2:
-            available_months = sorted(data['year_month'].unique())
-            month_range = st.select_slider("Select Month Range", available_months, value=(available_months[0], available_months[-1]))
+            available_months = months.unique().sort_values()
+            month_range = st.select_slider("Select Month Range", available_months, value=(available_months[0], available_months[-1]), format_func=str)
 
         # Filter by month range
-        df_filtered = data[(data['year_month'] >= month_range[0]) & (data['year_month'] <= month_range[1])]
+        df_filtered = filter_month_range(data, months, month_range[0], month_range[1])
 
         # ✅ Plot
         st.subheader("📈 Weather Data Visualization")
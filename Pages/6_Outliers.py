@@ -31,23 +31,23 @@ def detect_temperature_outliers(df, freq_cutoff=0.05, n_std=3):
     
     # High-pass filter
     cutoff_index = int(len(temp_dct) * freq_cutoff)
-    temp_dct_filtered = temp_dct.copy()
-    temp_dct_filtered[:cutoff_index] = 0
+    temp_dct[:cutoff_index] = 0  # in place: the unfiltered coefficients are not needed again
     
     # Get SATV
-    satv = idct(temp_dct_filtered, type=2, norm='ortho')
+    satv = idct(temp_dct, type=2, norm='ortho')
     
-    # Calculate robust statistics
+    # Calculate robust statistics (absolute deviations computed once, reused for the outlier test)
     median_satv = np.median(satv)
-    mad_satv = np.median(np.abs(satv - median_satv))
+    abs_dev = np.abs(satv - median_satv)
+    mad_satv = np.median(abs_dev)
     std_satv = mad_satv * 1.4826
     
     # SPC boundaries
     upper_boundary = median_satv + n_std * std_satv
     lower_boundary = median_satv - n_std * std_satv
     
-    # Identify outliers
-    outliers_mask = (satv > upper_boundary) | (satv < lower_boundary)
+    # Identify outliers (equivalent to satv outside [lower_boundary, upper_boundary])
+    outliers_mask = abs_dev > n_std * std_satv
     n_outliers = np.sum(outliers_mask)
     outlier_percentage = (n_outliers / len(temp)) * 100
     
@@ -63,10 +63,11 @@ def detect_temperature_outliers(df, freq_cutoff=0.05, n_std=3):
             'o', color='red', markersize=4, alpha=0.8, label=f'Outliers (n={n_outliers})')
     
     # Plot boundaries
-    ax.axhline(y=np.mean(temp) + upper_boundary, color='orange', 
+    temp_mean = temp.mean()
+    ax.axhline(y=temp_mean + upper_boundary, color='orange', 
                linestyle='--', linewidth=1.5, alpha=0.7, 
                label=f'Upper boundary (+{n_std}σ)')
-    ax.axhline(y=np.mean(temp) + lower_boundary, color='orange', 
+    ax.axhline(y=temp_mean + lower_boundary, color='orange', 
                linestyle='--', linewidth=1.5, alpha=0.7, 
                label=f'Lower boundary (-{n_std}σ)')
     
@@ -102,15 +103,14 @@ def detect_precipitation_anomalies(df, outlier_proportion=0.01, n_neighbors=50):
     
     # Prepare features for LOF
     precip_diff = np.diff(precip, prepend=precip[0])
-    X = np.column_stack([precip, precip_diff])
+    X = np.column_stack([precip, precip_diff]).astype(float, copy=False)
     
     # Add small jitter to handle duplicate values (common with zero precipitation)
-    jitter = np.random.RandomState(42).normal(0, 1e-6, X.shape)
-    X_jittered = X + jitter
+    X += np.random.RandomState(42).normal(0, 1e-6, X.shape)
     
     # Fit LOF
     lof = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=outlier_proportion)
-    predictions = lof.fit_predict(X_jittered)
+    predictions = lof.fit_predict(X)
     lof_scores = lof.negative_outlier_factor_
     
     # Identify anomalies
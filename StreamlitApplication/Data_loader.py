@@ -13,7 +13,20 @@ def load_data() -> pd.DataFrame:
         st.error(f"The data file was not found: {DATAFILE}")
         st.stop()  # Stop the app if the file is missing
 
-    df = pd.read_csv(DATAFILE, parse_dates=["time"]) # Read the CSV file and parse the "time" column as datetime
-    df.set_index("time", inplace=True)
+    # Parse "time" and use it as the index while reading; the pyarrow engine (shipped with streamlit) parses in parallel
+    df = pd.read_csv(DATAFILE, engine="pyarrow", parse_dates=["time"], index_col="time")
     df.sort_index(inplace=True)
-    return df
\ No newline at end of file
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def load_head(n: int = 10) -> pd.DataFrame:
+    """Read only the first n rows of the CSV, for previews that don't need the full dataset."""
+    return pd.read_csv(DATAFILE, parse_dates=["time"], index_col="time", nrows=n)
+
+
+@st.cache_data(show_spinner=False)
+def count_rows() -> int:
+    """Count the data rows in the CSV without parsing it."""
+    with DATAFILE.open("rb") as f:
+        return sum(1 for _ in f) - 1  # minus the header line
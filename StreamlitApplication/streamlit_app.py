@@ -126,12 +126,13 @@ if current == "Home":
 	# Show a simple home page with a preview (load Data_loader if available)
 	st.header("Home")
 	try:
-		from StreamlitApplication.Data_loader import load_data
+		from StreamlitApplication.Data_loader import count_rows, load_head
 
-		df = load_data()
+		# Only the preview rows are parsed; the row count comes from a line count
+		df_preview = load_head(10)
 		st.subheader("Preview (first 10 rows)")
-		st.dataframe(df.head(10), use_container_width=True)
-		st.write(f"Data has {len(df)} rows and {len(df.columns)} columns.")
+		st.dataframe(df_preview, use_container_width=True)
+		st.write(f"Data has {count_rows()} rows and {len(df_preview.columns)} columns.")
 	except Exception as e:
 		st.warning("Could not load data preview: " + str(e))
 
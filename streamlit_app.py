@@ -1,14 +1,18 @@
-import importlib
-import importlib.util
 import re
 from pathlib import Path
 
 import streamlit as st
 
-# Runner page: sidebar navigation that loads page modules dynamically.
+# Runner page: native multipage navigation (st.navigation) over the discovered page files.
 st.set_page_config(page_title="IND320 App", layout="wide")
 
+# Leading digits/underscores/hyphens/spaces stripped from page file names for display
+_PAGE_PREFIX_RE = re.compile(r'^[\d_\-\s]+')
+
+
 # Helper: discover page modules under two possible folders
+# (cached for the process lifetime: the page files don't change while the app runs)
+@st.cache_resource
 def discover_pages():
 	"""Return a list of (module_name, display_name, path) for pages found."""
 	candidates = []
@@ -19,9 +23,9 @@ def discover_pages():
 		for py in sorted(root.glob("*.py")):
 			name = py.stem
 			# create a display name: remove leading digits/underscores/hyphens then prettify
-			display_raw = re.sub(r'^[\d_\-\s]+', '', name)
+			display_raw = _PAGE_PREFIX_RE.sub('', name)
 			display = display_raw.replace("_", " ").title()
-			# module path for importlib (use a dynamic spec)
+			# dotted module name (folder.stem), kept for callers that import pages directly
 			module_name = f"{py.parent.name}.{name}"
 			candidates.append((module_name, display, str(py)))
 	return candidates
@@ -72,35 +76,8 @@ for i, (_mod, display, path) in enumerate(pages):
 	emoji_map[path] = emoji_palette[i % len(emoji_palette)]
 
 
-# Sidebar navigation
-st.sidebar.title("Navigation 🧭")
-
-# Initialize session state for current page
-if 'page' not in st.session_state:
-	st.session_state['page'] = 'Home'
-
-# Home button with emoji
-if st.sidebar.button("🏠 Home", key="nav_home"):
-	st.session_state['page'] = 'Home'
-
-# One button per discovered page (each page gets a distinct emoji from the palette)
-for i, (_mod, display, path) in enumerate(pages):
-	emoji = emoji_map.get(path, emoji_for(display))
-	if st.sidebar.button(f"{emoji} {display}", key=f"nav_{i}"):
-		st.session_state['page'] = path
-
-
-def load_module_from_path(path_str: str, module_alias: str):
-	"""Import a module given a file path using importlib and return the module."""
-	spec = importlib.util.spec_from_file_location(module_alias, path_str)
-	module = importlib.util.module_from_spec(spec)
-	spec.loader.exec_module(module)
-	return module
-
-
-current = st.session_state.get('page', 'Home')
-
-if current == "Home":
+def home_page():
+	"""Landing page listing the discovered pages."""
 	# App title only shown on the Home page
 	st.title("IND320 Streamlit App 🚀")
 
@@ -116,35 +93,11 @@ if current == "Home":
 			st.markdown(f"- {emoji} **{display}**: Open this page to access tools, visualizations, tables, or analyses related to {display.lower()}.")
 	else:
 		st.write("- No additional pages were discovered. Add Python files to the Pages folder to create pages.")
-else:
-	# Find the page by file path stored in session state
-	match = None
-	for mod_name, display, path in pages:
-		if path == current:
-			match = (mod_name, display, path)
-			break
-	if match is None:
-		st.error("Page not found or not discovered")
-	else:
-		mod_name, display, path = match
-		# Show the page header with the emoji assigned from the palette
-		st.header(f"{emoji_map.get(path, emoji_for(display))} {display}")
-		try:
-			module = load_module_from_path(path, mod_name)
-			# Call main() if present, otherwise importing executed the page already
-			if hasattr(module, "main") and callable(module.main):
-				module.main()
-		except Exception as e:
-			st.error(f"Error loading page {display}: {e}")
-			# Hide the page header in the main area for non-Home pages by injecting CSS.
-			# This keeps the navigation in the sidebar visible while removing the big title rendered by st.header.
-			if current != "Home":
-				st.markdown(
-					"""
-					<style>
-					/* Hide the first header (where st.header renders) on subpages */
-					[data-testid="stApp"] h2:first-of-type { display: none !important; }
-					</style>
-					""",
-					unsafe_allow_html=True,
-				)
\ No newline at end of file
+
+
+# Sidebar navigation: Streamlit routes by URL and runs the selected page file itself
+nav_pages = [st.Page(home_page, title="Home", icon="🏠", default=True)]
+for _mod, display, path in pages:
+	nav_pages.append(st.Page(path, title=display, icon=emoji_map.get(path, emoji_for(display))))
+
+st.navigation(nav_pages).run()